@@ -3,6 +3,11 @@ import logging
 import argparse
 from typing import Dict
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from clairvoyance import graphql
 from clairvoyance import oracle
 
@@ -17,7 +22,7 @@ def parse_args():
         "-i",
         "--input",
         metavar="<file>",
-        type=argparse.FileType("r"),
+        type=argparse.FileType("r", encoding="utf-8"),
         help="Input file containing JSON schema which will be supplemented with obtained information",
     )
     parser.add_argument(
@@ -80,7 +85,7 @@ if __name__ == "__main__":
     input_schema = None
     if args.input:
         with args.input as f:
-            input_schema = json.load(f)
+            input_schema = orjson.loads(f.read()) if orjson else json.load(f)
 
     input_document = args.document if args.document else None
 
@@ -91,12 +96,12 @@ if __name__ == "__main__":
         )
 
         if args.output:
-            with open(args.output, "w") as f:
+            with open(args.output, "w", encoding="utf-8") as f:
                 f.write(schema)
         else:
             print(schema)
 
-        input_schema = json.loads(schema)
+        input_schema = orjson.loads(schema) if orjson else json.loads(schema)
         s = graphql.Schema(schema=input_schema)
         next = s.get_type_without_fields(ignore)
         ignore.add(next)
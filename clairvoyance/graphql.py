@@ -3,38 +3,83 @@ import requests
 
 import json
 import logging
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from typing import Dict
 from typing import Any
 from typing import Set
-
-
-def post(url, data=None, json=None, **kwargs):
-    session = requests.Session()
-
-    retries = urllib3.util.Retry(
+from typing import Tuple
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_RETRY_METHODS = frozenset(
+    {
+        "DELETE",
+        "GET",
+        "HEAD",
+        "OPTIONS",
+        "PUT",
+        "TRACE",
+        "POST",
+    }
+)
+_RETRY_STATUSES = frozenset(range(500, 600))
+
+try:
+    _retries = urllib3.util.Retry(
         status=5,
-        method_whitelist={
-            "DELETE",
-            "GET",
-            "HEAD",
-            "OPTIONS",
-            "PUT",
-            "TRACE",
-            "POST",
-        },
-        status_forcelist=range(500, 600),
+        allowed_methods=_RETRY_METHODS,
+        status_forcelist=_RETRY_STATUSES,
         backoff_factor=2,
     )
+except TypeError:
+    # urllib3 < 1.26 doesn't know about allowed_methods
+    _retries = urllib3.util.Retry(
+        status=5,
+        method_whitelist=_RETRY_METHODS,
+        status_forcelist=_RETRY_STATUSES,
+        backoff_factor=2,
+    )
+
+_POOL_MAXSIZE = 32
+
+_adapter = requests.adapters.HTTPAdapter(
+    max_retries=_retries, pool_connections=1, pool_maxsize=_POOL_MAXSIZE
+)
 
-    adapter = requests.adapters.HTTPAdapter(max_retries=retries)
+# Shared between all calls so that connections to the endpoint are kept alive
+_SESSION = requests.Session()
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
 
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
 
-    response = session.post(url, data=data, json=json, **kwargs)
+def get_session() -> requests.Session:
+    return _SESSION
 
-    return response
+
+def post(url, data=None, json=None, **kwargs):
+    return _SESSION.post(url, data=data, json=json, **kwargs)
+
+
+# Sends payloads concurrently over the shared session, responses keep payloads order
+def post_many(
+    url, json_payloads: List[Any], headers=None, concurrency: int = 8
+) -> List[requests.Response]:
+    # More workers than pooled connections would discard connections instead of
+    # keeping them alive
+    concurrency = max(1, min(concurrency, _POOL_MAXSIZE))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(
+            executor.map(lambda p: post(url, json=p, headers=headers), json_payloads)
+        )
 
 
 class Schema:
@@ -45,6 +90,13 @@ class Schema:
         subscriptionType: str = None,
         schema: Dict[str, Any] = None,
     ):
+        # child type name -> [(parent type name, field name), ...], built lazily
+        self._parent_index = {}  # type: Dict[str, List[Tuple[str, str]]]
+        self._path_cache = {}  # type: Dict[str, List[str]]
+        self._dirty = True
+        # insertion-ordered set of non INPUT_OBJECT types which have no fields yet
+        self._types_without_fields = {}  # type: Dict[str, None]
+
         if schema:
             self._schema = {
                 "directives": schema["data"]["__schema"]["directives"],
@@ -81,75 +133,119 @@ class Schema:
             if self.subscriptionType:
                 self.add_type(subscriptionType, "OBJECT")
 
+        self._types_without_fields = {
+            t.name: None
+            for t in self.types.values()
+            if not t.fields and t.kind != "INPUT_OBJECT"
+        }
+
+        # root type name -> operation keyword
+        self._root_ops = {}  # type: Dict[str, str]
+        for key, op in (
+            ("queryType", "query"),
+            ("mutationType", "mutation"),
+            ("subscriptionType", "subscription"),
+        ):
+            if self._schema[key]:
+                self._root_ops[self._schema[key]["name"]] = op
+        self._root_names = frozenset(self._root_ops)
+
     # Adds type to schema if it's not exists already
     def add_type(self, name: str, kind: str) -> None:
         if name not in self.types:
             typ = Type(name=name, kind=kind)
             self.types[name] = typ
+            self._dirty = True
+            if kind != "INPUT_OBJECT":
+                self._types_without_fields[name] = None
+
+    def add_field(self, typename: str, field: "Field") -> None:
+        self.types[typename].add_field(field)
+        self._types_without_fields.pop(typename, None)
+        self._dirty = True
 
     def to_json(self):
-        schema = {"data": {"__schema": self._schema}}
+        schema_data = dict(self._schema)
+        schema_data["types"] = [t.to_json() for t in self.types.values()]
+        schema = {"data": {"__schema": schema_data}}
+
+        if orjson:
+            output = orjson.dumps(
+                schema, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+            ).decode()
+        else:
+            output = json.dumps(schema, indent=2, sort_keys=True, ensure_ascii=False)
+        return output
+
+    def _build_parent_index(self) -> None:
+        self._parent_index = {}
+        self._path_cache = {}
 
         for t in self.types.values():
-            schema["data"]["__schema"]["types"].append(t.to_json())
+            for f in t.fields:
+                self._parent_index.setdefault(f.type.name, []).append((t.name, f.name))
 
-        output = json.dumps(schema, indent=4, sort_keys=True)
-        return output
+        self._dirty = False
 
     def get_path_from_root(self, name: str) -> List[str]:
-        logging.debug(f"Entered get_path_from_root({name})")
-        path_from_root = []
+        logging.debug("Entered get_path_from_root(%s)", name)
 
         if name not in self.types:
             raise Exception(f"Type '{name}' not in schema!")
 
-        roots = [
-            self._schema["queryType"]["name"] if self._schema["queryType"] else "",
-            self._schema["mutationType"]["name"]
-            if self._schema["mutationType"]
-            else "",
-            self._schema["subscriptionType"]["name"]
-            if self._schema["subscriptionType"]
-            else "",
-        ]
-        roots = [r for r in roots if r]
-
-        while name not in roots:
-            for t in self.types.values():
-                for f in t.fields:
-                    if f.type.name == name:
-                        path_from_root.insert(0, f.name)
-                        name = t.name
-
-        # Prepend queryType or mutationType
-        path_from_root.insert(0, name)
-
-        return path_from_root
-
-    def get_type_without_fields(self, ignore: Set[str] = []) -> str:
-        for t in self.types.values():
-            if not t.fields and t.name not in ignore and t.kind != "INPUT_OBJECT":
-                return t.name
+        if self._dirty:
+            self._build_parent_index()
+
+        if name in self._path_cache:
+            return list(self._path_cache[name])
+
+        # Breadth-first search towards the roots, every type is visited once so
+        # cycles and disconnected types can't make it loop forever.
+        # type -> (child type, field name) leading back to `name`
+        visited = {name: None}  # type: Dict[str, Optional[Tuple[str, str]]]
+        queue = collections.deque([name])
+
+        while queue:
+            current = queue.popleft()
+            if current in self._root_names:
+                break
+
+            for parent, field_name in self._parent_index.get(current, []):
+                if parent not in visited:
+                    visited[parent] = (current, field_name)
+                    queue.append(parent)
+        else:
+            raise Exception(f"Type '{name}' unreachable from roots")
+
+        # Starts with queryType or mutationType
+        path_from_root = [current]
+        while visited[current]:
+            current, field_name = visited[current]
+            path_from_root.append(field_name)
+
+        self._path_cache[name] = path_from_root
+
+        return list(path_from_root)
+
+    def get_type_without_fields(self, ignore: Optional[Set[str]] = None) -> str:
+        ignore = ignore or set()
+
+        for name in self._types_without_fields:
+            if name not in ignore:
+                return name
 
         return ""
 
     def convert_path_to_document(self, path: List[str]) -> str:
-        logging.debug(f"Entered convert_path_to_document({path})")
-        doc = "FUZZ"
-
-        while len(path) > 1:
-            doc = f"{path.pop()} {{ {doc} }}"
-
-        if path[0] == self._schema["queryType"]["name"]:
-            doc = f"query {{ {doc} }}"
-        elif path[0] == self._schema["mutationType"]["name"]:
-            doc = f"mutation {{ {doc} }}"
-        elif path[0] == self._schema["subscriptionType"]["name"]:
-            doc = f"subscription {{ {doc} }}"
-        else:
+        logging.debug("Entered convert_path_to_document(%s)", path)
+        fields = path[1:]
+        doc = " { ".join(fields + ["FUZZ"]) + " }" * len(fields)
+
+        op = self._root_ops.get(path[0])
+        if op is None:
             raise Exception("Unknown operation type")
 
-        return doc
+        return f"{op} {{ {doc} }}"
 
 
 class Config:
@@ -157,9 +253,31 @@ class Config:
         self.url = ""
         self.headers = dict()
         self.bucket_size = 4096
+        self.concurrency = 8
+
+
+# TypeRef.to_json() output only depends on these flags, so it's shared between
+# all TypeRefs with the same shape. Callers must not mutate the returned dicts.
+_TYPEREF_JSON_CACHE = {}  # type: Dict[Tuple[Any, ...], Dict[str, Any]]
+
+# Constant parts of to_json() output, merged with the per-object keys
+_INPUT_VALUE_TEMPLATE = {"defaultValue": None, "description": None}
+_FIELD_TEMPLATE = {
+    "deprecationReason": None,
+    "description": None,
+    "isDeprecated": False,
+}
+_TYPE_OBJECT_TEMPLATE = {
+    "description": None,
+    "enumValues": None,
+    "interfaces": [],
+    "possibleTypes": None,
+}
 
 
 class TypeRef:
+    __slots__ = ("name", "kind", "is_list", "non_null", "non_null_item")
+
     def __init__(
         self,
         name: str,
@@ -174,36 +292,56 @@ class TypeRef:
         self.kind = kind
         self.is_list = is_list
         self.non_null = non_null
-        self.list = self.is_list
         self.non_null_item = non_null_item
 
+    @property
+    def list(self) -> bool:
+        return self.is_list
+
     def __eq__(self, other):
         if isinstance(other, TypeRef):
-            for attr in self.__dict__.keys():
-                if self.__dict__[attr] != other.__dict__[attr]:
-                    return False
-            return True
+            return (
+                self.name,
+                self.kind,
+                self.is_list,
+                self.non_null,
+                self.non_null_item,
+            ) == (
+                other.name,
+                other.kind,
+                other.is_list,
+                other.non_null,
+                other.non_null_item,
+            )
         return False
 
     def __str__(self):
-        return str(self.__dict__)
+        return str({attr: getattr(self, attr) for attr in self.__slots__})
 
     def to_json(self) -> Dict[str, Any]:
+        key = (self.kind, self.name, self.is_list, self.non_null_item, self.non_null)
+        if key in _TYPEREF_JSON_CACHE:
+            return _TYPEREF_JSON_CACHE[key]
+
         j = {"kind": self.kind, "name": self.name, "ofType": None}
 
         if self.non_null_item:
             j = {"kind": "NON_NULL", "name": None, "ofType": j}
 
-        if self.list:
+        if self.is_list:
             j = {"kind": "LIST", "name": None, "ofType": j}
 
         if self.non_null:
             j = {"kind": "NON_NULL", "name": None, "ofType": j}
 
+        _TYPEREF_JSON_CACHE[key] = j
+
         return j
 
 
 class InputValue:
+    __slots__ = ("name", "type")
+
     def __init__(self, name: str, typ: TypeRef):
         self.name = name
         self.type = typ
@@ -213,8 +351,7 @@ class InputValue:
 
     def to_json(self):
         return {
-            "defaultValue": None,
-            "description": None,
+            **_INPUT_VALUE_TEMPLATE,
             "name": self.name,
             "type": self.type.to_json(),
         }
@@ -227,56 +364,69 @@ class InputValue:
         return cls(name=name, typ=typ)
 
 
-def field_or_arg_type_from_json(jso: Dict[str, Any]) -> "TypeRef":
-    typ = None
-
-    if jso["kind"] not in ["NON_NULL", "LIST"]:
-        typ = TypeRef(name=jso["name"], kind=jso["kind"])
-    elif not jso["ofType"]["ofType"]:
-        actual_type = jso["ofType"]
-
-        if jso["kind"] == "NON_NULL":
-            typ = TypeRef(
-                name=actual_type["name"],
-                kind=actual_type["kind"],
-                non_null=True,
-            )
-        elif jso["kind"] == "LIST":
-            typ = TypeRef(
-                name=actual_type["name"], kind=actual_type["kind"], is_list=True
-            )
-        else:
-            raise Exception(f"Unexpected type.kind: {jso['kind']}")
-    elif not jso["ofType"]["ofType"]["ofType"]:
-        actual_type = jso["ofType"]["ofType"]
-
-        if jso["kind"] == "NON_NULL":
-            typ = TypeRef(actual_type["name"], actual_type["kind"], True, False, True)
-        elif jso["kind"] == "LIST":
-            typ = TypeRef(
-                name=actual_type["name"],
-                kind=actual_type["kind"],
-                is_list=True,
-                non_null_item=True,
-            )
+# Flattens nested ofType into ("NON_NULL", "LIST", ..., kind, name)
+def _typeref_signature(jso: Dict[str, Any]) -> Tuple[str, ...]:
+    signature = []
+
+    node = jso
+    node_kind = node["kind"]
+
+    while node_kind in ("NON_NULL", "LIST"):
+        signature.append(node_kind)
+        node = node["ofType"]
+        if not node:
+            raise Exception(f"Invalid field or arg ({node_kind} without 'ofType')")
+        node_kind = node["kind"]
+
+    signature.append(node_kind)
+    signature.append(node["name"])
+
+    return tuple(signature)
+
+
+# Identical shapes share one TypeRef, so returned TypeRefs must not be mutated
+@functools.lru_cache(maxsize=None)
+def _build_typeref(signature: Tuple[str, ...]) -> "TypeRef":
+    is_list = False
+    non_null_item = False
+    non_null = False
+
+    for wrapper in signature[:-2]:
+        if wrapper == "NON_NULL":
+            if is_list:
+                non_null_item = True
+            else:
+                non_null = True
         else:
-            raise Exception(f"Unexpected type.kind: {jso['kind']}")
-    elif not jso["ofType"]["ofType"]["ofType"]["ofType"]:
-        actual_type = jso["ofType"]["ofType"]["ofType"]
-        typ = TypeRef(
-            name=actual_type["name"],
-            kind=actual_type["kind"],
-            is_list=True,
-            non_null_item=True,
-            non_null=True,
-        )
-    else:
-        raise Exception("Invalid field or arg (too many 'ofType')")
+            # TypeRef can't express list of lists, so inner lists are collapsed
+            is_list = True
+
+    return TypeRef(
+        name=signature[-1],
+        kind=signature[-2],
+        is_list=is_list,
+        non_null_item=non_null_item,
+        non_null=non_null,
+    )
+
+
+# Shared plain built-in scalars, same no-mutation rule as _build_typeref()
+_SCALAR_FLYWEIGHTS = {
+    name: TypeRef(name=name, kind="SCALAR")
+    for name in ("String", "ID", "Int", "Float", "Boolean")
+}
+
 
-    return typ
+def field_or_arg_type_from_json(jso: Dict[str, Any]) -> "TypeRef":
+    if jso["kind"] == "SCALAR" and jso["name"] in _SCALAR_FLYWEIGHTS:
+        return _SCALAR_FLYWEIGHTS[jso["name"]]
+
+    return _build_typeref(_typeref_signature(jso))
 
 
 class Field:
+    __slots__ = ("name", "type", "args")
+
     def __init__(self, name: str, typeref: TypeRef, args: List[InputValue] = None):
         if not typeref:
             raise Exception(f"Can't create {name} Field from {typeref} TypeRef.")
@@ -287,10 +437,8 @@ class Field:
 
     def to_json(self):
         return {
+            **_FIELD_TEMPLATE,
             "args": [a.to_json() for a in self.args],
-            "deprecationReason": None,
-            "description": None,
-            "isDeprecated": False,
             "name": self.name,
             "type": self.type.to_json(),
         }
@@ -307,34 +455,44 @@ class Field:
         return cls(name, typ, args)
 
 
+# dirty hack: types without fields get this one on output
+_DUMMY_FIELD = Field("dummy", TypeRef(name="String", kind="SCALAR"))
+
+
 class Type:
+    __slots__ = ("name", "kind", "fields", "_json_cache")
+
     def __init__(self, name: str = "", kind: str = "", fields: List[Field] = None):
         self.name = name
         self.kind = kind
         self.fields = fields or []  # type: List[Field]
+        self._json_cache = None  # type: Optional[Dict[str, Any]]
+
+    # Use this instead of fields.append() so that cached to_json() output is reset
+    def add_field(self, field: Field) -> None:
+        self.fields.append(field)
+        self._json_cache = None
 
     def to_json(self):
-        # dirty hack
-        if not self.fields:
-            field_typeref = TypeRef(name="String", kind="SCALAR")
-            dummy = Field("dummy", field_typeref)
-            self.fields.append(dummy)
+        if self._json_cache is not None:
+            return self._json_cache
+
+        fields = self.fields or (_DUMMY_FIELD,)
 
         output = {
-            "description": None,
-            "enumValues": None,
-            "interfaces": [],
+            **_TYPE_OBJECT_TEMPLATE,
             "kind": self.kind,
             "name": self.name,
-            "possibleTypes": None,
         }
 
         if self.kind in ["OBJECT", "INTERFACE"]:
-            output["fields"] = [f.to_json() for f in self.fields]
+            output["fields"] = [f.to_json() for f in fields]
             output["inputFields"] = None
         elif self.kind == "INPUT_OBJECT":
             output["fields"] = None
-            output["inputFields"] = [f.to_json() for f in self.fields]
+            output["inputFields"] = [f.to_json() for f in fields]
+
+        self._json_cache = output
 
         return output
 
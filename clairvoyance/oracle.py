@@ -66,14 +66,21 @@ def probe_valid_fields(
     # then remove fields that produce an error message
     valid_fields = set(wordlist)
 
-    for i in range(0, len(wordlist), config.bucket_size):
-        bucket = wordlist[i : i + config.bucket_size]
-
-        document = input_document.replace("FUZZ", " ".join(bucket))
+    buckets = [
+        wordlist[i : i + config.bucket_size]
+        for i in range(0, len(wordlist), config.bucket_size)
+    ]
+    responses = graphql.post_many(
+        config.url,
+        [
+            {"query": input_document.replace("FUZZ", " ".join(bucket))}
+            for bucket in buckets
+        ],
+        headers=config.headers,
+        concurrency=config.concurrency,
+    )
 
-        response = graphql.post(
-            config.url, headers=config.headers, json={"query": document}
-        )
+    for bucket, response in zip(buckets, responses):
         errors = response.json()["errors"]
         logging.debug(
             f"Sent {len(bucket)} fields, recieved {len(errors)} errors in {response.elapsed.total_seconds()} seconds"
@@ -445,7 +452,7 @@ def clairvoyance(
                 f"Skip probe_args() for '{field.name}' of type '{field.type.name}'"
             )
 
-        schema.types[typename].fields.append(field)
+        schema.add_field(typename, field)
         schema.add_type(field.type.name, "OBJECT")
 
     return schema.to_json()
@@ -15,21 +15,62 @@ class TestSchema(unittest.TestCase):
             schema_json = json.load(f)
             self.schema = graphql.Schema(schema=schema_json)
 
+    def test_to_json_is_repeatable(self):
+        want = self.schema.to_json()
+        got = self.schema.to_json()
+        self.assertEqual(got, want)
+
     def test_get_path_from_root(self):
         want = ["Query", "homes", "paymentSubscriptions"]
         got = self.schema.get_path_from_root("PaymentSubscriptionsForHome")
         self.assertEqual(got, want)
 
+    def test_get_path_from_root_raises_on_unreachable_type(self):
+        self.schema.add_type("Orphan", "OBJECT")
+        self.schema.add_type("Cycle", "OBJECT")
+        self.schema.add_field(
+            "Orphan", graphql.Field("cycle", graphql.TypeRef("Cycle", "OBJECT"))
+        )
+        self.schema.add_field(
+            "Cycle", graphql.Field("orphan", graphql.TypeRef("Orphan", "OBJECT"))
+        )
+
+        with self.assertRaises(Exception) as cm:
+            self.schema.get_path_from_root("Orphan")
+
+        self.assertEqual(str(cm.exception), "Type 'Orphan' unreachable from roots")
+
+    def test_get_path_from_root_of_root(self):
+        want = ["Query"]
+        got = self.schema.get_path_from_root("Query")
+        self.assertEqual(got, want)
+
+    def test_get_path_from_root_is_not_shared(self):
+        want = ["Query", "homes", "paymentSubscriptions"]
+        got = self.schema.get_path_from_root("PaymentSubscriptionsForHome")
+        got.pop()
+        got = self.schema.get_path_from_root("PaymentSubscriptionsForHome")
+        self.assertEqual(got, want)
+
     def test_get_type_without_fields(self):
         want = "Mutation"
         got = self.schema.get_type_without_fields()
         self.assertEqual(got, want)
 
+    def test_get_type_without_fields_after_add_field(self):
+        field = graphql.Field("setNameForHome", graphql.TypeRef("String", "SCALAR"))
+        self.schema.add_field("Mutation", field)
+
+        want = "String"
+        got = self.schema.get_type_without_fields()
+        self.assertEqual(got, want)
+
     def test_convert_path_to_document(self):
         path = ["Query", "homes", "paymentSubscriptions"]
         want = "query { homes { paymentSubscriptions { FUZZ } } }"
         got = self.schema.convert_path_to_document(path)
         self.assertEqual(got, want)
+        self.assertEqual(path, ["Query", "homes", "paymentSubscriptions"])
 
     def test_raise_exception_on_unknown_operation_type(self):
         input = ["UnknownType"]
@@ -62,6 +103,10 @@ class TestPost(unittest.TestCase):
         response = graphql.post("http://localhost:8000")
         self.assertEqual(response.status_code, 200)
 
+    def test_post_many_retries_on_500(self):
+        responses = graphql.post_many("http://localhost:8000", [{}, {}, {}])
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+
 
 class TestToJson(unittest.TestCase):
     def test_typeref_to_json(self):
@@ -87,6 +132,23 @@ class TestToJson(unittest.TestCase):
         # https://github.com/nikitastupin/clairvoyance/issues/9
         self.assertEqual(got, want)
 
+    def test_type_to_json_without_fields(self):
+        typ = graphql.Type(name="Query", kind="OBJECT")
+
+        got = typ.to_json()
+
+        self.assertEqual([f["name"] for f in got["fields"]], ["dummy"])
+        self.assertEqual(typ.fields, [])
+
+    def test_type_to_json_after_add_field(self):
+        typ = graphql.Type(name="Query", kind="OBJECT")
+        typ.to_json()
+
+        typ.add_field(graphql.Field("homes", graphql.TypeRef("Home", "OBJECT")))
+        got = typ.to_json()
+
+        self.assertEqual([f["name"] for f in got["fields"]], ["homes"])
+
 
 class TestFromJson(unittest.TestCase):
     def test_typeref_from_json(self):
@@ -106,6 +168,103 @@ class TestFromJson(unittest.TestCase):
 
         self.assertEqual(got.to_json(), want.to_json())
 
+    def test_typeref_from_json_non_null_list_of_non_null(self):
+        want = graphql.TypeRef("String", "SCALAR", True, True, True)
+
+        typeref = {
+            "kind": "NON_NULL",
+            "name": None,
+            "ofType": {
+                "kind": "LIST",
+                "name": None,
+                "ofType": {
+                    "kind": "NON_NULL",
+                    "name": None,
+                    "ofType": {"kind": "SCALAR", "name": "String", "ofType": None},
+                },
+            },
+        }
+
+        got = graphql.field_or_arg_type_from_json(typeref)
+
+        self.assertEqual(got.to_json(), want.to_json())
+
+    def test_typeref_from_json_list_of_list(self):
+        want = graphql.TypeRef("Float", "SCALAR", is_list=True)
+
+        typeref = {
+            "kind": "LIST",
+            "name": None,
+            "ofType": {
+                "kind": "LIST",
+                "name": None,
+                "ofType": {"kind": "SCALAR", "name": "Float", "ofType": None},
+            },
+        }
+
+        got = graphql.field_or_arg_type_from_json(typeref)
+
+        self.assertEqual(got, want)
+
+    def test_typeref_from_json_non_null_list_of_list(self):
+        want = graphql.TypeRef("Float", "SCALAR", is_list=True, non_null=True)
+
+        typeref = {
+            "kind": "NON_NULL",
+            "name": None,
+            "ofType": {
+                "kind": "LIST",
+                "name": None,
+                "ofType": {
+                    "kind": "LIST",
+                    "name": None,
+                    "ofType": {"kind": "SCALAR", "name": "Float", "ofType": None},
+                },
+            },
+        }
+
+        got = graphql.field_or_arg_type_from_json(typeref)
+
+        self.assertEqual(got, want)
+
+    def test_typeref_from_json_is_shared_between_identical_shapes(self):
+        typeref = {
+            "kind": "NON_NULL",
+            "name": None,
+            "ofType": {"kind": "SCALAR", "name": "String", "ofType": None},
+        }
+
+        first = graphql.field_or_arg_type_from_json(typeref)
+        second = graphql.field_or_arg_type_from_json(dict(typeref))
+
+        self.assertIs(first, second)
+
+    def test_input_value_from_json(self):
+        want = graphql.InputValue(
+            "input", graphql.TypeRef("SetNameInput", "INPUT_OBJECT", non_null=True)
+        )
+
+        input_value = {
+            "defaultValue": None,
+            "description": None,
+            "name": "input",
+            "type": {
+                "kind": "NON_NULL",
+                "name": None,
+                "ofType": {
+                    "kind": "INPUT_OBJECT",
+                    "name": "SetNameInput",
+                    "ofType": None,
+                },
+            },
+        }
+
+        got = graphql.InputValue.from_json(input_value)
+
+        self.assertEqual(got.name, want.name)
+        self.assertEqual(got.type, want.type)
+        self.assertEqual(got.to_json(), input_value)
+
 
 if __name__ == "__main__":
     unittest.main()